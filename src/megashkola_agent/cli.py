@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import asyncio
 import os
-import time
+from collections.abc import Awaitable
+from typing import TypeVar
 
 import typer
 
@@ -13,41 +15,90 @@ from megashkola_agent.utils import get_logger
 app = typer.Typer(no_args_is_help=True)
 log = get_logger("code-agent-cli")
 
+T = TypeVar("T")
+
 
 @app.command()
 def run_once(issue: int | None = typer.Option(None, "--issue", "-i")) -> None:
     """Process a single issue by number."""
-    print("Finish")
     settings = load_settings()
     if issue is None:
         issue_env = os.getenv("ISSUE_NUMBER", "")
         issue = int(issue_env) if issue_env else None
     if issue is None:
         raise typer.BadParameter("Provide --issue or ISSUE_NUMBER env var")
-    agent = CodeAgent(settings)
-    agent.run_once(issue)
-    print("Finish")
+    asyncio.run(_run_issue(CodeAgent(settings), issue))
+
+
+async def _run_issue(agent: CodeAgent, issue_number: int) -> None:
+    async with agent:
+        await agent.run_once_async(issue_number)
 
 
 @app.command()
 def poll() -> None:
-    """Poll for open issues with the agent label and process them."""
+    """Poll for open issues with the agent label and process them.
+
+    Fallback for deployments that cannot receive webhooks; prefer ``serve``.
+    """
     settings = load_settings()
     if not settings.github_token or not settings.github_repo:
         raise typer.BadParameter("USER_ACCESS_TOKEN and TARGET_REPO are required")
 
-    handle = get_repo(settings.github_token, settings.github_repo)
-    agent = CodeAgent(settings)
+    asyncio.run(_poll(CodeAgent(settings)))
 
-    while True:
-        issues = list(find_open_issues_with_label(handle.repo, settings.agent_label))
-        if not issues:
-            log.info("No issues with label '%s'.", settings.agent_label)
-        for issue in issues:
+
+async def _poll(agent: CodeAgent) -> None:
+    settings = agent.settings
+    handle = await asyncio.to_thread(get_repo, settings.github_token, settings.github_repo)
+    sem = asyncio.Semaphore(settings.max_parallel_issues)
+    async with agent:
+        while True:
+            # Start each issue as soon as it is listed instead of waiting for every page.
+            issues = find_open_issues_with_label(handle, settings.agent_label)
+            numbers: list[int] = []
+            tasks = []
             try:
-                agent.run_once(issue.number)
+                while (issue := await asyncio.to_thread(next, issues, None)) is not None:
+                    numbers.append(issue.number)
+                    tasks.append(
+                        asyncio.create_task(_guarded(agent.run_once_async(issue.number), sem))
+                    )
             except Exception as exc:
-                log.exception("Failed on issue %s: %s", issue.number, exc)
+                # Still wait for the issues already started; the next tick lists them again.
+                log.error("Failed to list issues: %s", exc, exc_info=exc)
+            else:
+                if not tasks:
+                    log.info("No issues with label '%s'.", settings.agent_label)
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            for number, result in zip(numbers, results, strict=True):
+                if isinstance(result, Exception):
+                    log.error("Failed on issue %s: %s", number, result, exc_info=result)
+            await asyncio.sleep(settings.poll_interval_seconds)
+
+
+async def _guarded(coro: Awaitable[T], sem: asyncio.Semaphore) -> T:
+    async with sem:
+        return await coro
+
+
+@app.command()
+def serve(
+    host: str = typer.Option("0.0.0.0", "--host"),
+    port: int = typer.Option(8000, "--port"),
+) -> None:
+    """Receive GitHub issue webhooks and process labeled issues."""
+    settings = load_settings()
+    if not settings.github_token or not settings.github_repo:
+        raise typer.BadParameter("USER_ACCESS_TOKEN and TARGET_REPO are required")
+    if not settings.webhook_secret:
+        raise typer.BadParameter("WEBHOOK_SECRET is required")
+    # Imported here so run-once and poll do not pay for FastAPI/pydantic at startup.
+    import uvicorn
+
+    from megashkola_agent import webhook
+
+    uvicorn.run(webhook.app, host=host, port=port)
 
 
 if __name__ == "__main__":
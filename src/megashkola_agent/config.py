@@ -1,3 +1,4 @@
+import functools
 import os
 from dataclasses import dataclass
 
@@ -13,9 +14,26 @@ class Settings:
     llm_api_key: str = ""
     llm_model: str = ""
     max_iterations: int = 3
+    max_parallel_issues: int = 4
+    llm_max_concurrent: int = 4
+    llm_requests_per_minute: int = 60
+    llm_tokens_per_minute: int = 60000
+    poll_interval_seconds: int = 300
+    github_cache_ttl_seconds: int = 60
+    github_login_cache_ttl_seconds: int = 86400
+    webhook_secret: str = ""
 
 
+def _int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, ""))
+    except ValueError:
+        return default
+
+
+@functools.lru_cache(maxsize=1)
 def load_settings() -> Settings:
+    # Settings is frozen, so the single cached instance is safe to share across tasks/threads.
     return Settings(
         github_token=os.getenv("USER_ACCESS_TOKEN", ""),
         github_repo=os.getenv("TARGET_REPO", ""),
@@ -25,5 +43,13 @@ def load_settings() -> Settings:
         llm_provider=os.getenv("LLM_PROVIDER", ""),
         llm_api_key=os.getenv("LLM_API_KEY", ""),
         llm_model=os.getenv("LLM_MODEL", ""),
-        max_iterations=int(os.getenv("MAX_ITERATIONS", "3")),
+        max_iterations=_int_env("MAX_ITERATIONS", 3),
+        max_parallel_issues=_int_env("MAX_PARALLEL_ISSUES", 4),
+        llm_max_concurrent=_int_env("LLM_MAX_CONCURRENT", 4),
+        llm_requests_per_minute=_int_env("LLM_REQUESTS_PER_MINUTE", 60),
+        llm_tokens_per_minute=_int_env("LLM_TOKENS_PER_MINUTE", 60000),
+        poll_interval_seconds=_int_env("POLL_INTERVAL_SECONDS", 300),
+        github_cache_ttl_seconds=_int_env("GITHUB_CACHE_TTL_SECONDS", 60),
+        github_login_cache_ttl_seconds=_int_env("GITHUB_LOGIN_CACHE_TTL_SECONDS", 86400),
+        webhook_secret=os.getenv("WEBHOOK_SECRET", ""),
     )
@@ -1,40 +1,189 @@
 from __future__ import annotations
 
-from collections.abc import Iterable
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator
+from contextlib import aclosing
 from dataclasses import dataclass
+from typing import Any
 
+import httpx
+import orjson
+import requests
 from github import Github
 from github.Issue import Issue
 from github.PullRequest import PullRequest
 from github.Repository import Repository
 
+from megashkola_agent.cached import TTLCache
+from megashkola_agent.config import load_settings
 
-@dataclass
+API_URL = "https://api.github.com"
+GRAPHQL_URL = f"{API_URL}/graphql"
+
+_OPEN_ISSUES_QUERY = """
+query($owner: String!, $name: String!, $label: String!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    issues(first: 50, labels: [$label], states: OPEN, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      nodes { number title }
+    }
+  }
+}
+"""
+
+# Comments scanned when looking for the latest bot comment.
+RECENT_COMMENTS_LIMIT = 30
+
+# Repository metadata rarely changes; the authenticated login never does.
+_metadata_cache = TTLCache(ttl=lambda: load_settings().github_cache_ttl_seconds)
+_login_cache = TTLCache(ttl=lambda: load_settings().github_login_cache_ttl_seconds)
+
+
+@dataclass(frozen=True)
 class RepoHandle:
     gh: Github
     repo: Repository
-
-
+    token: str
+
+    @property
+    def owner_and_name(self) -> tuple[str, str]:
+        owner, name = self.repo.full_name.split("/", 1)
+        return owner, name
+
+
+@dataclass(frozen=True)
+class IssueRef:
+    number: int
+    title: str
+
+
+@dataclass(frozen=True)
+class PullRef:
+    number: int
+    title: str
+    head_ref: str
+
+
+class ConditionalReader:
+    """GitHub REST reader that revalidates responses with ETags.
+
+    Unchanged resources come back as 304, which costs no primary rate limit and no JSON
+    parsing; the body stored with the ETag is returned instead.
+    """
+
+    def __init__(self, token: str, max_entries: int = 512) -> None:
+        self._client = httpx.AsyncClient(
+            base_url=API_URL,
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+            },
+            timeout=httpx.Timeout(30),
+        )
+        # LRU of url -> (etag, body, links); the daemons run indefinitely.
+        self._etags: OrderedDict[str, tuple[str, Any, dict[str, str]]] = OrderedDict()
+        self._max_entries = max_entries
+
+    async def get(
+        self, url: str, *, conditional: bool = True, **params: Any
+    ) -> tuple[Any, dict[str, str]]:
+        """Return the decoded body and the ``rel -> url`` pagination links.
+
+        GitHub's ETag covers the body only, so on a 304 the links are the ones stored with
+        the last 200. Pass ``conditional=False`` when they must be current.
+        """
+        key = str(self._client.build_request("GET", url, params=params or None).url)
+        cached = self._etags.get(key) if conditional else None
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        resp = await self._client.get(key, headers=headers)
+        if resp.status_code == 304 and cached:
+            if key in self._etags:  # may have been evicted by a concurrent request
+                self._etags.move_to_end(key)
+            return cached[1], cached[2]
+        resp.raise_for_status()
+        data = orjson.loads(resp.content)
+        links = {rel: link["url"] for rel, link in resp.links.items()}
+        etag = resp.headers.get("ETag")
+        if etag:
+            self._etags[key] = (etag, data, links)
+            self._etags.move_to_end(key)
+            while len(self._etags) > self._max_entries:
+                self._etags.popitem(last=False)
+        return data, links
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+@_metadata_cache
 def get_repo(token: str, full_name: str) -> RepoHandle:
     gh = Github(token)
     repo = gh.get_repo(full_name)
-    return RepoHandle(gh=gh, repo=repo)
+    return RepoHandle(gh=gh, repo=repo, token=token)
 
 
-def find_issue_by_number(repo: Repository, number: int) -> Issue:
-    return repo.get_issue(number=number)
+@_login_cache
+def get_login(token: str) -> str:
+    # Keyed on the token, not a client: get_repo builds a new Github on every TTL expiry.
+    return Github(token).get_user().login
 
 
-def find_open_issues_with_label(repo: Repository, label: str) -> Iterable[Issue]:
-    return repo.get_issues(state="open", labels=[label])
+def issue_branch(issue_number: int) -> str:
+    return f"agent/issue-{issue_number}"
 
 
-def find_pr_for_issue(repo: Repository, issue_number: int) -> PullRequest | None:
-    # Heuristic: look for PR with branch name or title containing issue number.
-    for pr in repo.get_pulls(state="open", sort="created", direction="desc"):
-        if f"issue-{issue_number}" in pr.head.ref or f"#{issue_number}" in pr.title:
-            return pr
-    return None
+def gql(token: str, query: str, variables: dict[str, Any]) -> dict[str, Any]:
+    resp = requests.post(
+        GRAPHQL_URL,
+        headers={"Authorization": f"Bearer {token}"},
+        json={"query": query, "variables": variables},
+        timeout=30,
+    )
+    resp.raise_for_status()
+    body = orjson.loads(resp.content)
+    if body.get("errors"):
+        raise RuntimeError(f"GitHub GraphQL error: {body['errors']}")
+    return body["data"]
+
+
+def find_issue_by_number(repo: Repository, number: int) -> Issue:
+    return repo.get_issue(number=number)
+
+
+def find_open_issues_with_label(handle: RepoHandle, label: str) -> Iterator[IssueRef]:
+    owner, name = handle.owner_and_name
+    cursor: str | None = None
+    while True:
+        data = gql(
+            handle.token,
+            _OPEN_ISSUES_QUERY,
+            {"owner": owner, "name": name, "label": label, "cursor": cursor},
+        )
+        issues = data["repository"]["issues"]
+        for node in issues["nodes"]:
+            yield IssueRef(number=node["number"], title=node["title"])
+        if not issues["pageInfo"]["hasNextPage"]:
+            return
+        cursor = issues["pageInfo"]["endCursor"]
+
+
+def _find_pr_by_head(repo: Repository, branch: str) -> PullRequest | None:
+    pulls = repo.get_pulls(state="open", head=f"{repo.owner.login}:{branch}")
+    return next(iter(pulls), None)
+
+
+async def find_pr_for_issue(
+    reader: ConditionalReader, full_name: str, issue_number: int
+) -> PullRef | None:
+    owner = full_name.split("/", 1)[0]
+    pulls, _ = await reader.get(
+        f"/repos/{full_name}/pulls", state="open", head=f"{owner}:{issue_branch(issue_number)}"
+    )
+    if not pulls:
+        return None
+    pr = pulls[0]
+    return PullRef(number=pr["number"], title=pr["title"], head_ref=pr["head"]["ref"])
 
 
 def create_or_update_pr(
@@ -44,24 +193,62 @@ def create_or_update_pr(
     title: str,
     body: str,
 ) -> PullRequest:
-    existing = None
-    for pr in repo.get_pulls(state="open", head=f"{repo.owner.login}:{head_branch}"):
-        existing = pr
-        break
+    existing = _find_pr_by_head(repo, head_branch)
     if existing:
         existing.edit(title=title, body=body)
         return existing
     return repo.create_pull(title=title, body=body, base=base_branch, head=head_branch)
 
 
-def get_latest_reviewer_comment(pr: PullRequest, bot_login: str | None) -> str | None:
-    comments = list(pr.get_issue_comments())
-    comments.reverse()
-    for comment in comments:
+async def iter_recent_comments(
+    reader: ConditionalReader, full_name: str, number: int
+) -> AsyncIterator[dict[str, Any]]:
+    """Yield the comments of an issue or PR newest first, fetching pages only as needed."""
+    # The endpoint only sorts oldest first, so walk back from the last page. The first page
+    # is fetched unconditionally: a 304 would replay a stale rel="last" once it fills up.
+    url = f"/repos/{full_name}/issues/{number}/comments"
+    page, links = await reader.get(url, conditional=False, per_page=100)
+    next_url: str | None = links.get("last")
+    if next_url is None:
+        for comment in reversed(page):
+            yield comment
+        return
+    while next_url:
+        page, links = await reader.get(next_url)
+        for comment in reversed(page):
+            yield comment
+        next_url = links.get("prev")
+
+
+async def get_recent_comments(
+    reader: ConditionalReader,
+    full_name: str,
+    number: int,
+    limit: int | None = RECENT_COMMENTS_LIMIT,
+) -> list[dict[str, Any]]:
+    """Return up to ``limit`` comments of an issue or PR, newest first; ``None`` means all."""
+    comments: list[dict[str, Any]] = []
+    async with aclosing(iter_recent_comments(reader, full_name, number)) as stream:
+        async for comment in stream:
+            comments.append(comment)
+            if limit is not None and len(comments) >= limit:
+                break
+    return comments
+
+
+async def get_latest_reviewer_comment(
+    reader: ConditionalReader,
+    full_name: str,
+    pr_number: int,
+    bot_login: str | None,
+    limit: int = RECENT_COMMENTS_LIMIT,
+) -> str | None:
+    for comment in await get_recent_comments(reader, full_name, pr_number, limit):
+        body = comment.get("body") or ""
         if bot_login:
-            if comment.user and comment.user.login == bot_login:
-                return comment.body
+            if (comment.get("user") or {}).get("login") == bot_login:
+                return body
         else:
-            if "STATUS:" in (comment.body or ""):
-                return comment.body
+            if "STATUS:" in body:
+                return body
     return None
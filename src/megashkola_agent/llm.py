@@ -1,9 +1,17 @@
 from __future__ import annotations
 
-import json
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
+from typing import Any
 
-import requests
+import httpx
+import orjson
+
+# Transient provider failures that callers may retry after backing off.
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+OPENAI_URL = "https://api.openai.com/v1/chat/completions"
+YANDEX_URL = "https://llm.api.cloud.yandex.net/foundationModels/v1/completion"
 
 
 @dataclass
@@ -12,30 +20,73 @@ class LlmResponse:
 
 
 class LlmClient:
+    """Async chat client holding one keep-alive HTTP/2 connection pool; call ``aclose()``."""
+
     def __init__(self, provider: str, api_key: str, model: str) -> None:
         self.provider = provider.lower().strip()
         self.api_key = api_key
         self.model = model
+        auth = f"Api-Key {api_key}" if self.provider == "yandex" else f"Bearer {api_key}"
+        self._client = httpx.AsyncClient(
+            http2=True,
+            headers={"Authorization": auth},
+            timeout=httpx.Timeout(60),
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+        )
+
+    async def __aenter__(self) -> LlmClient:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
 
     def enabled(self) -> bool:
         return bool(self.provider and self.api_key)
 
-    def chat(self, system: str, user: str) -> LlmResponse | None:
+    async def chat(self, system: str, user: str) -> LlmResponse | None:
         if not self.enabled():
             return None
         if self.provider == "openai":
-            return self._openai_chat(system, user)
+            return await self._openai_chat(system, user)
         if self.provider == "yandex":
-            return self._yandex_chat(system, user)
+            return await self._yandex_chat(system, user)
         return None
 
-    def _openai_chat(self, system: str, user: str) -> LlmResponse | None:
-        url = "https://api.openai.com/v1/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-        payload = {
+    async def chat_stream(self, system: str, user: str) -> AsyncIterator[str]:
+        """Yield the reply as it is generated; closing the iterator early aborts the request."""
+        if not self.enabled():
+            return
+        if self.provider == "openai":
+            async for chunk in self._openai_stream(system, user):
+                yield chunk
+        elif self.provider == "yandex":
+            async for chunk in self._yandex_stream(system, user):
+                yield chunk
+
+    async def _post(self, url: str, payload: dict[str, Any]) -> dict[str, Any] | None:
+        resp = await self._client.post(url, json=payload)
+        if resp.status_code in RETRYABLE_STATUS_CODES:
+            # Surface transient failures so RateLimitedLlm can back off and retry.
+            resp.raise_for_status()
+        if resp.is_error:
+            return None
+        return orjson.loads(resp.content)
+
+    async def _stream_lines(self, url: str, payload: dict[str, Any]) -> AsyncIterator[str]:
+        async with self._client.stream("POST", url, json=payload) as resp:
+            if resp.status_code in RETRYABLE_STATUS_CODES:
+                resp.raise_for_status()
+            if resp.is_error:
+                return
+            async for line in resp.aiter_lines():
+                if line:
+                    yield line
+
+    def _openai_payload(self, system: str, user: str) -> dict[str, Any]:
+        return {
             "model": self.model or "gpt-4o-mini",
             "messages": [
                 {"role": "system", "content": system},
@@ -43,36 +94,54 @@ class LlmClient:
             ],
             "temperature": 0.2,
         }
-        resp = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
-        try:
-            resp.raise_for_status()
-        except requests.HTTPError:
+
+    async def _openai_chat(self, system: str, user: str) -> LlmResponse | None:
+        data = await self._post(OPENAI_URL, self._openai_payload(system, user))
+        if data is None:
             return None
-        data = resp.json()
         content = data["choices"][0]["message"]["content"]
         return LlmResponse(text=content)
 
-    def _yandex_chat(self, system: str, user: str) -> LlmResponse | None:
+    async def _openai_stream(self, system: str, user: str) -> AsyncIterator[str]:
+        payload = self._openai_payload(system, user)
+        payload["stream"] = True
+        # Server-sent events: "data: {chunk}" lines terminated by "data: [DONE]".
+        async for line in self._stream_lines(OPENAI_URL, payload):
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:") :].strip()
+            if data == "[DONE]":
+                return
+            choices = orjson.loads(data).get("choices") or []
+            content = choices[0].get("delta", {}).get("content") if choices else None
+            if content:
+                yield content
+
+    def _yandex_payload(self, system: str, user: str, stream: bool = False) -> dict[str, Any]:
         # Uses YandexGPT compatible chat endpoint if provided.
         # Expect env model like "gpt://<folder-id>/yandexgpt/latest".
-        url = "https://llm.api.cloud.yandex.net/foundationModels/v1/completion"
-        headers = {
-            "Authorization": f"Api-Key {self.api_key}",
-            "Content-Type": "application/json",
-        }
-        payload = {
+        return {
             "modelUri": self.model,
-            "completionOptions": {"stream": False, "temperature": 0.2, "maxTokens": 2000},
+            "completionOptions": {"stream": stream, "temperature": 0.2, "maxTokens": 2000},
             "messages": [
                 {"role": "system", "text": system},
                 {"role": "user", "text": user},
             ],
         }
-        resp = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
-        try:
-            resp.raise_for_status()
-        except requests.HTTPError:
+
+    async def _yandex_chat(self, system: str, user: str) -> LlmResponse | None:
+        data = await self._post(YANDEX_URL, self._yandex_payload(system, user))
+        if data is None:
             return None
-        data = resp.json()
         content = data["result"]["alternatives"][0]["message"]["text"]
         return LlmResponse(text=content)
+
+    async def _yandex_stream(self, system: str, user: str) -> AsyncIterator[str]:
+        payload = self._yandex_payload(system, user, stream=True)
+        # One JSON object per line, each carrying the full text generated so far.
+        seen = 0
+        async for line in self._stream_lines(YANDEX_URL, payload):
+            text = orjson.loads(line)["result"]["alternatives"][0]["message"]["text"]
+            if len(text) > seen:
+                yield text[seen:]
+                seen = len(text)
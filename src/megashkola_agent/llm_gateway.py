@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+
+import httpx
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
+
+from megashkola_agent.config import Settings
+from megashkola_agent.llm import RETRYABLE_STATUS_CODES, LlmClient, LlmResponse
+from megashkola_agent.utils import get_logger
+
+MAX_ATTEMPTS = 5
+MAX_BACKOFF_SECONDS = 30
+
+
+class LlmStreamInterrupted(Exception):
+    """A streamed reply failed after some of it had already been yielded."""
+
+
+def estimate_tokens(text: str) -> int:
+    # OpenAI ballpark: roughly four characters per token.
+    return max(1, len(text) // 4)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, httpx.TransportError)
+
+
+class TokenBucket:
+    """Holds up to ``capacity`` tokens, refilled continuously over ``period`` seconds."""
+
+    def __init__(self, capacity: int, period: float = 60.0) -> None:
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def consume(self, amount: int) -> None:
+        # Requests larger than the bucket would never fit; let them drain it instead.
+        needed = min(float(amount), self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= needed:
+                    self.tokens -= needed
+                    return
+                await asyncio.sleep((needed - self.tokens) / self.rate)
+
+
+class RateLimitedLlm:
+    """LlmClient wrapper bounding concurrency, request rate and token rate."""
+
+    def __init__(
+        self,
+        client: LlmClient,
+        max_concurrent: int,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+    ) -> None:
+        self.client = client
+        self.log = get_logger("llm-gateway")
+        self._sem = asyncio.Semaphore(max_concurrent)
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> RateLimitedLlm:
+        client = LlmClient(
+            provider=settings.llm_provider,
+            api_key=settings.llm_api_key,
+            model=settings.llm_model,
+        )
+        return cls(
+            client,
+            max_concurrent=settings.llm_max_concurrent,
+            requests_per_minute=settings.llm_requests_per_minute,
+            tokens_per_minute=settings.llm_tokens_per_minute,
+        )
+
+    async def __aenter__(self) -> RateLimitedLlm:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    def enabled(self) -> bool:
+        return self.client.enabled()
+
+    async def chat(self, system: str, user: str) -> LlmResponse | None:
+        if not self.enabled():
+            return None
+        async with self._sem:
+            try:
+                return await self._chat_with_retry(system, user)
+            except (httpx.HTTPStatusError, httpx.TransportError) as exc:
+                self.log.warning("LLM request failed after %s attempts: %s", MAX_ATTEMPTS, exc)
+                return None
+
+    async def chat_stream(self, system: str, user: str) -> AsyncIterator[str]:
+        """Stream a reply under the same limits as ``chat``.
+
+        Failures are retried only until the first chunk arrives; after that a retry would
+        repeat text the caller has already consumed, so ``LlmStreamInterrupted`` is raised
+        instead and the partial reply must be discarded.
+        """
+        if not self.enabled():
+            return
+        async with self._sem:
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                await self._consume(system, user)
+                started = False
+                try:
+                    async with aclosing(self.client.chat_stream(system, user)) as stream:
+                        async for chunk in stream:
+                            started = True
+                            yield chunk
+                    return
+                except (httpx.HTTPStatusError, httpx.TransportError) as exc:
+                    if started:
+                        raise LlmStreamInterrupted(str(exc)) from exc
+                    if attempt == MAX_ATTEMPTS or not _is_retryable(exc):
+                        self.log.warning("LLM stream failed on attempt %s: %s", attempt, exc)
+                        return
+                await asyncio.sleep(min(MAX_BACKOFF_SECONDS, 2 ** (attempt - 1)))
+
+    async def _consume(self, system: str, user: str) -> None:
+        await self._requests.consume(1)
+        await self._tokens.consume(estimate_tokens(system + user))
+
+    @retry(
+        retry=retry_if_exception(_is_retryable),
+        wait=wait_exponential(multiplier=1, max=MAX_BACKOFF_SECONDS),
+        stop=stop_after_attempt(MAX_ATTEMPTS),
+        reraise=True,
+    )
+    async def _chat_with_retry(self, system: str, user: str) -> LlmResponse | None:
+        await self._consume(system, user)
+        return await self.client.chat(system, user)
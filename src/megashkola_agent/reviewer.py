@@ -1,16 +1,33 @@
 from __future__ import annotations
 
+import asyncio
+import io
 import json
 import os
 import re
 from dataclasses import dataclass
 
 from github import Github
+from github.File import File
 from github.PullRequest import PullRequest
 
-from .llm import LlmClient
+from .llm_gateway import RateLimitedLlm
 from .utils import get_logger
 
+_ISSUE_TITLE_RE = re.compile(r"#(\d+)")
+_ISSUE_BRANCH_RE = re.compile(r"issue-(\d+)")
+
+_PROMPT_TEMPLATE = (
+    "PR title: %(pr_title)s\n\n"
+    "PR body:\n%(pr_body)s\n\n"
+    "Issue title: %(issue_title)s\n\n"
+    "Issue body:\n%(issue_body)s\n\n"
+    "Changed files:\n%(file_list)s\n\n"
+    "Diff:\n%(patch_text)s\n\n"
+    "CI status: %(ci_status)s\n\n"
+    "Check if changes satisfy the issue requirements and CI is green."
+)
+
 
 @dataclass
 class ReviewContext:
@@ -19,10 +36,11 @@ class ReviewContext:
     issue_title: str
     issue_body: str
     ci_status: str
+    files: list[File]
 
 
 class ReviewerAgent:
-    def __init__(self, token: str, repo: str, llm: LlmClient) -> None:
+    def __init__(self, token: str, repo: str, llm: RateLimitedLlm) -> None:
         self.token = token
         self.repo_full = repo
         self.llm = llm
@@ -30,27 +48,34 @@ class ReviewerAgent:
         self.gh = Github(token)
         self.repo = self.gh.get_repo(repo)
 
-    def review_pr(self, pr_number: int, ci_status: str) -> None:
-        pr = self.repo.get_pull(pr_number)
+    async def review_pr(self, pr_number: int, ci_status: str) -> None:
+        pr = await asyncio.to_thread(self.repo.get_pull, pr_number)
         issue_number = self._extract_issue_number(pr)
-        issue_title = ""
-        issue_body = ""
-        if issue_number is not None:
-            issue = self.repo.get_issue(number=issue_number)
-            issue_title = issue.title
-            issue_body = issue.body or ""
+        # The file listing is paginated; fetch it once, alongside the issue lookup. gather
+        # also collects the listing's outcome when the lookup fails first.
+        files, (issue_title, issue_body) = await asyncio.gather(
+            asyncio.to_thread(lambda: list(pr.get_files())),
+            self._fetch_issue(issue_number),
+        )
         ctx = ReviewContext(
             pr=pr,
             issue_number=issue_number,
             issue_title=issue_title,
             issue_body=issue_body,
             ci_status=ci_status,
+            files=files,
         )
 
-        verdict, summary, details = self._generate_review(ctx)
-        self._publish_review(pr, verdict, summary, details)
+        verdict, summary, details = await self._generate_review(ctx)
+        await asyncio.to_thread(self._publish_review, pr, verdict, summary, details)
 
-    def _generate_review(self, ctx: ReviewContext) -> tuple[str, str, str]:
+    async def _fetch_issue(self, issue_number: int | None) -> tuple[str, str]:
+        if issue_number is None:
+            return "", ""
+        issue = await asyncio.to_thread(self.repo.get_issue, number=issue_number)
+        return issue.title, issue.body or ""
+
+    async def _generate_review(self, ctx: ReviewContext) -> tuple[str, str, str]:
         if ctx.ci_status.lower() != "success":
             msg = f"CI status is {ctx.ci_status}. Please fix CI failures."
             return "CHANGES_REQUESTED", msg, msg
@@ -58,8 +83,7 @@ class ReviewerAgent:
         # Fallback heuristic: check for agent_output file update.
         if ctx.issue_number is not None:
             expected = f"agent_output/issue-{ctx.issue_number}.md"
-            files = [f.filename for f in ctx.pr.get_files()]
-            if expected not in files:
+            if expected not in (f.filename for f in ctx.files):
                 msg = f"Expected file {expected} not found in PR. Please add output or code changes."
                 return ("CHANGES_REQUESTED", msg, msg)
 
@@ -67,8 +91,8 @@ class ReviewerAgent:
             msg = "LLM not configured; minimal checks passed."
             return "APPROVED", msg, msg
 
-        prompt = self._build_prompt(ctx)
-        response = self.llm.chat(
+        prompt = await asyncio.to_thread(self._build_prompt, ctx)
+        response = await self.llm.chat(
             system="You are a strict code reviewer. Reply with STATUS: APPROVED or STATUS: CHANGES_REQUESTED and a short rationale.",
             user=prompt,
         )
@@ -82,23 +106,30 @@ class ReviewerAgent:
 
     def _build_prompt(self, ctx: ReviewContext) -> str:
         pr = ctx.pr
-        files = list(pr.get_files())
-        file_list = "\n".join([f"- {f.filename}" for f in files])
-        patches = []
-        for f in files:
+        # One pass over the files; patches can be large, so avoid intermediate lists.
+        file_buf = io.StringIO()
+        patch_buf = io.StringIO()
+        for f in ctx.files:
+            if file_buf.tell():
+                file_buf.write("\n")
+            file_buf.write("- ")
+            file_buf.write(f.filename)
             if f.patch:
-                patches.append(f"File: {f.filename}\n{f.patch}")
-        patch_text = "\n\n".join(patches) if patches else "No diff available."
-        return (
-            f"PR title: {pr.title}\n\n"
-            f"PR body:\n{pr.body}\n\n"
-            f"Issue title: {ctx.issue_title}\n\n"
-            f"Issue body:\n{ctx.issue_body}\n\n"
-            f"Changed files:\n{file_list}\n\n"
-            f"Diff:\n{patch_text}\n\n"
-            f"CI status: {ctx.ci_status}\n\n"
-            "Check if changes satisfy the issue requirements and CI is green."
-        )
+                if patch_buf.tell():
+                    patch_buf.write("\n\n")
+                patch_buf.write("File: ")
+                patch_buf.write(f.filename)
+                patch_buf.write("\n")
+                patch_buf.write(f.patch)
+        return _PROMPT_TEMPLATE % {
+            "pr_title": pr.title,
+            "pr_body": pr.body,
+            "issue_title": ctx.issue_title,
+            "issue_body": ctx.issue_body,
+            "file_list": file_buf.getvalue(),
+            "patch_text": patch_buf.getvalue() or "No diff available.",
+            "ci_status": ctx.ci_status,
+        }
 
     def _publish_review(self, pr: PullRequest, verdict: str, summary: str, details: str) -> None:
         status = f"STATUS: {verdict}"
@@ -109,11 +140,11 @@ class ReviewerAgent:
 
     def _extract_issue_number(self, pr: PullRequest) -> int | None:
         if pr.title:
-            match = re.search(r"#(\d+)", pr.title)
+            match = _ISSUE_TITLE_RE.search(pr.title)
             if match:
                 return int(match.group(1))
         if pr.head and pr.head.ref:
-            match = re.search(r"issue-(\d+)", pr.head.ref)
+            match = _ISSUE_BRANCH_RE.search(pr.head.ref)
             if match:
                 return int(match.group(1))
         return None
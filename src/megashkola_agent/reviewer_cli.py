@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 import os
 
 import typer
 
 from .config import load_settings
-from .llm import LlmClient
+from .llm_gateway import RateLimitedLlm
 from .reviewer import ReviewerAgent, pr_number_from_event
 
 app = typer.Typer(no_args_is_help=True)
@@ -22,9 +23,14 @@ def review(pr: int | None = typer.Option(None, "--pr", "-p")) -> None:
         raise typer.BadParameter("Provide --pr or set PR_NUMBER")
 
     ci_status = os.getenv("CI_STATUS", "success")
-    llm = LlmClient(settings.llm_provider, settings.llm_api_key, settings.llm_model)
+    llm = RateLimitedLlm.from_settings(settings)
     reviewer = ReviewerAgent(settings.github_token, settings.github_repo, llm)
-    reviewer.review_pr(pr_number, ci_status)
+    asyncio.run(_review(reviewer, pr_number, ci_status))
+
+
+async def _review(reviewer: ReviewerAgent, pr_number: int, ci_status: str) -> None:
+    async with reviewer.llm:
+        await reviewer.review_pr(pr_number, ci_status)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+from typing import Any
+
+from fastapi import FastAPI, HTTPException, Request
+
+from megashkola_agent.code_agent import CodeAgent
+from megashkola_agent.config import Settings, load_settings
+from megashkola_agent.utils import get_logger
+
+log = get_logger("code-agent-webhook")
+
+ISSUE_ACTIONS = {"labeled", "opened"}
+
+
+def verify_signature(secret: str, body: bytes, signature: str | None) -> bool:
+    if not secret or not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(f"sha256={expected}", signature)
+
+
+def issue_number_from_payload(payload: dict[str, Any], label: str) -> int | None:
+    if payload.get("action") not in ISSUE_ACTIONS:
+        return None
+    issue = payload.get("issue") or {}
+    if payload["action"] == "labeled":
+        # Only the agent label itself triggers a run, not any label on a labeled issue.
+        if (payload.get("label") or {}).get("name") != label:
+            return None
+    else:
+        labels = {item.get("name") for item in issue.get("labels") or []}
+        if label not in labels:
+            return None
+    if "number" not in issue:
+        return None
+    return int(issue["number"])
+
+
+async def _worker(settings: Settings, queue: asyncio.Queue[int], pending: set[int]) -> None:
+    agent = CodeAgent(settings)
+    async with agent:
+        while True:
+            issue_number = await queue.get()
+            try:
+                await agent.run_once_async(issue_number)
+            except Exception as exc:
+                log.exception("Failed on issue %s: %s", issue_number, exc)
+            finally:
+                pending.discard(issue_number)
+                queue.task_done()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    settings = load_settings()
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    # Issues queued or in flight; an issue opened with the label sends opened + labeled.
+    pending: set[int] = set()
+    app.state.settings = settings
+    app.state.queue = queue
+    app.state.pending = pending
+    worker = asyncio.create_task(_worker(settings, queue, pending))
+    try:
+        yield
+    finally:
+        worker.cancel()
+        with suppress(asyncio.CancelledError):
+            await worker
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.post("/webhooks/github")
+async def github_webhook(request: Request) -> dict[str, str]:
+    settings: Settings = request.app.state.settings
+    body = await request.body()
+    if not verify_signature(
+        settings.webhook_secret, body, request.headers.get("X-Hub-Signature-256")
+    ):
+        raise HTTPException(status_code=401, detail="Invalid signature")
+
+    if request.headers.get("X-GitHub-Event") != "issues":
+        return {"status": "ignored"}
+    issue_number = issue_number_from_payload(await request.json(), settings.agent_label)
+    if issue_number is None:
+        return {"status": "ignored"}
+
+    pending: set[int] = request.app.state.pending
+    if issue_number in pending:
+        return {"status": "duplicate"}
+    pending.add(issue_number)
+    request.app.state.queue.put_nowait(issue_number)
+    log.info("Queued issue %s from webhook.", issue_number)
+    return {"status": "queued"}
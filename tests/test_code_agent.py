@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from megashkola_agent import code_agent
+from megashkola_agent.code_agent import _DIFF_HEADER_WINDOW, AgentContext, CodeAgent
+from megashkola_agent.config import Settings
+from megashkola_agent.llm_gateway import LlmStreamInterrupted
+
+DIFF = "diff --git a/app.py b/app.py\n--- a/app.py\n+++ b/app.py\n@@ -1 +1 @@\n-a\n+b\n"
+CTX = AgentContext(issue_number=1, issue_title="Fix", issue_body="Body", reviewer_feedback="")
+
+
+class FakeLlm:
+    def __init__(self, chunks: list[str], interrupt: bool = False) -> None:
+        self.chunks = chunks
+        self.interrupt = interrupt
+        self.sent = 0
+        self.closed = False
+
+    def enabled(self) -> bool:
+        return True
+
+    async def chat_stream(self, system: str, user: str):
+        try:
+            for chunk in self.chunks:
+                self.sent += 1
+                yield chunk
+            if self.interrupt:
+                raise LlmStreamInterrupted("connection reset")
+        finally:
+            self.closed = True
+
+
+@pytest.fixture
+def agent():
+    agent = CodeAgent(Settings(github_token="token", github_repo="o/r"))
+    yield agent
+    asyncio.run(agent.github.aclose())
+
+
+def _generate(agent: CodeAgent, llm: FakeLlm) -> str | None:
+    asyncio.run(agent.llm.aclose())
+    agent.llm = llm
+    return asyncio.run(agent._generate_patch(CTX))
+
+
+def test_returns_streamed_diff(agent):
+    chunks = [DIFF[:10], DIFF[10:], "+" * _DIFF_HEADER_WINDOW + "\n"]
+    llm = FakeLlm(chunks)
+    assert _generate(agent, llm) == "".join(chunks).strip()
+    assert llm.sent == len(chunks)
+
+
+def test_stops_early_without_diff_header(agent):
+    llm = FakeLlm(["x" * 100] * 20)
+    assert _generate(agent, llm) is None
+    assert llm.sent == -(-_DIFF_HEADER_WINDOW // 100)
+    assert llm.closed
+
+
+def test_short_reply_without_diff_is_rejected(agent):
+    assert _generate(agent, FakeLlm(["I am not sure."])) is None
+
+
+def test_interrupted_stream_discards_partial_patch(agent):
+    llm = FakeLlm([DIFF, "+" * _DIFF_HEADER_WINDOW], interrupt=True)
+    assert _generate(agent, llm) is None
+    assert llm.closed
+
+
+def _context(title: str, body: str) -> AgentContext:
+    return AgentContext(issue_number=1, issue_title=title, issue_body=body, reviewer_feedback="")
+
+
+def test_hello_rule_writes_file(agent, tmp_path):
+    agent._apply_simple_rules(_context("Say HELLO", "in Python please"), str(tmp_path))
+    assert (tmp_path / "hello.py").read_text() == 'print("Hello, world!")\n'
+
+
+def test_hello_rule_needs_every_keyword(agent, tmp_path):
+    agent._apply_simple_rules(_context("Say hello", "in Rust"), str(tmp_path))
+    assert not (tmp_path / "hello.py").exists()
+
+
+def test_rules_see_overlapping_and_nested_keywords(agent, monkeypatch, tmp_path):
+    fired: list[str] = []
+    rules = [
+        (frozenset({"py"}), lambda _: fired.append("py")),
+        (frozenset({"python"}), lambda _: fired.append("python")),
+        (frozenset({"ab", "bc"}), lambda _: fired.append("ab+bc")),
+        (frozenset({"thon", "xyz"}), lambda _: fired.append("thon+xyz")),
+    ]
+    keyword_re, implied = code_agent._compile_keywords(k for kws, _ in rules for k in kws)
+    monkeypatch.setattr(code_agent, "_RULES", rules)
+    monkeypatch.setattr(code_agent, "_KEYWORD_RE", keyword_re)
+    monkeypatch.setattr(code_agent, "_IMPLIED_KEYWORDS", implied)
+
+    agent._apply_simple_rules(_context("Python", "ABC"), str(tmp_path))
+    assert fired == ["py", "python", "ab+bc"]
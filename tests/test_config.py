@@ -0,0 +1,28 @@
+import pytest
+
+from megashkola_agent.config import _int_env, load_settings
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [(None, 7), ("", 7), ("abc", 7), ("1.5", 7), ("12", 12), (" 12 ", 12), ("-3", -3)],
+)
+def test_int_env(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv("AGENT_TEST_INT", raising=False)
+    else:
+        monkeypatch.setenv("AGENT_TEST_INT", value)
+    assert _int_env("AGENT_TEST_INT", 7) == expected
+
+
+def test_load_settings_falls_back_on_malformed_ints(monkeypatch):
+    monkeypatch.setenv("MAX_ITERATIONS", "three")
+    monkeypatch.setenv("POLL_INTERVAL_SECONDS", "60")
+    load_settings.cache_clear()
+    try:
+        settings = load_settings()
+        assert settings.max_iterations == 3
+        assert settings.poll_interval_seconds == 60
+        assert load_settings() is settings
+    finally:
+        load_settings.cache_clear()
@@ -0,0 +1,131 @@
+import asyncio
+import hashlib
+
+import httpx
+import orjson
+
+from megashkola_agent.github_client import (
+    API_URL,
+    ConditionalReader,
+    get_recent_comments,
+    iter_recent_comments,
+)
+
+
+def _reader(handler, max_entries: int = 512) -> ConditionalReader:
+    reader = ConditionalReader("token", max_entries=max_entries)
+    asyncio.run(reader.aclose())
+    reader._client = httpx.AsyncClient(base_url=API_URL, transport=httpx.MockTransport(handler))
+    return reader
+
+
+class Server:
+    """Serves one JSON body per path with a fixed ETag, answering 304 on a match."""
+
+    def __init__(self) -> None:
+        self.seen: list[tuple[str, str | None]] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        etag = f'"{request.url.path}"'
+        sent = request.headers.get("If-None-Match")
+        self.seen.append((request.url.path, sent))
+        if sent == etag:
+            return httpx.Response(304)
+        return httpx.Response(
+            200,
+            json={"path": request.url.path},
+            headers={"ETag": etag, "Link": f'<{API_URL}/next>; rel="next"'},
+        )
+
+
+def test_not_modified_reuses_stored_body_and_links():
+    server = Server()
+    reader = _reader(server)
+
+    async def run():
+        first = await reader.get("/repos/o/r", per_page=100)
+        second = await reader.get("/repos/o/r", per_page=100)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second == ({"path": "/repos/o/r"}, {"next": f"{API_URL}/next"})
+    assert server.seen == [("/repos/o/r", None), ("/repos/o/r", '"/repos/o/r"')]
+
+
+def test_etag_store_evicts_least_recently_used():
+    server = Server()
+    reader = _reader(server, max_entries=2)
+
+    async def run():
+        for path in ["/a", "/b", "/a", "/c", "/a", "/b"]:
+            await reader.get(path)
+
+    asyncio.run(run())
+    # "/b" was the oldest entry when "/c" arrived, so it was fetched again without an ETag.
+    assert [sent is not None for _, sent in server.seen] == [False, False, True, False, True, False]
+
+
+class CommentsServer:
+    """The issue comments endpoint: oldest first, 100 per page, ETags over the body only."""
+
+    def __init__(self, count: int) -> None:
+        self.comments = [{"id": i, "body": f"comment {i}"} for i in range(1, count + 1)]
+        self.seen: list[tuple[int, bool]] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params.get("page", "1"))
+        per_page = int(request.url.params.get("per_page", "30"))
+        self.seen.append((page, "If-None-Match" in request.headers))
+        body = orjson.dumps(self.comments[(page - 1) * per_page : page * per_page])
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304)
+        last = max(1, -(-len(self.comments) // per_page))
+        url = f"{API_URL}{request.url.path}?per_page={per_page}&page="
+        links = []
+        if page > 1:
+            links.append(f'<{url}{page - 1}>; rel="prev"')
+        if page < last:
+            links.append(f'<{url}{last}>; rel="last"')
+        headers = {"ETag": etag, "Link": ", ".join(links)}
+        return httpx.Response(200, content=body, headers=headers)
+
+
+def _ids(reader: ConditionalReader) -> list[int]:
+    async def run() -> list[int]:
+        return [c["id"] async for c in iter_recent_comments(reader, "o/r", 1)]
+
+    return asyncio.run(run())
+
+
+def test_iter_recent_comments_single_page():
+    server = CommentsServer(3)
+    assert _ids(_reader(server)) == [3, 2, 1]
+    assert server.seen == [(1, False)]
+
+
+def test_iter_recent_comments_walks_back_from_last_page():
+    server = CommentsServer(250)
+    reader = _reader(server)
+    assert _ids(reader) == list(range(250, 0, -1))
+    assert [page for page, _ in server.seen] == [1, 3, 2, 1]
+    # Walking again revalidates every page but the probe.
+    server.seen.clear()
+    assert _ids(reader) == list(range(250, 0, -1))
+    assert server.seen == [(1, False), (3, True), (2, True), (1, True)]
+
+
+def test_get_recent_comments_stops_at_limit():
+    server = CommentsServer(250)
+    comments = asyncio.run(get_recent_comments(_reader(server), "o/r", 1, limit=30))
+    assert [c["id"] for c in comments] == list(range(250, 220, -1))
+    assert [page for page, _ in server.seen] == [1, 3]
+
+
+def test_new_page_is_found_although_first_page_is_unchanged():
+    server = CommentsServer(100)
+    reader = _reader(server)
+    assert _ids(reader)[0] == 100
+    # Page 1 keeps its body and ETag, but it now links to a second page.
+    server.comments.append({"id": 101, "body": "comment 101"})
+    assert _ids(reader)[:2] == [101, 100]
@@ -0,0 +1,57 @@
+import asyncio
+
+import httpx
+import orjson
+
+from megashkola_agent.llm import OPENAI_URL, YANDEX_URL, LlmClient
+
+
+def _collect(client: LlmClient) -> list[str]:
+    async def run() -> list[str]:
+        async with client:
+            return [chunk async for chunk in client.chat_stream("system", "user")]
+
+    return asyncio.run(run())
+
+
+def _client(provider: str, url: str, lines: list[str], requests: list[httpx.Request]) -> LlmClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert str(request.url) == url
+        requests.append(request)
+        return httpx.Response(200, content="\n".join(lines).encode())
+
+    client = LlmClient(provider=provider, api_key="key", model="model")
+    asyncio.run(client.aclose())
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def _sse(data: dict | str) -> str:
+    return "data: " + (data if isinstance(data, str) else orjson.dumps(data).decode())
+
+
+def test_openai_stream_yields_content_deltas():
+    lines = [
+        ": keep-alive",
+        _sse({"choices": [{"delta": {"role": "assistant"}}]}),
+        _sse({"choices": [{"delta": {"content": "Hel"}}]}),
+        "",
+        _sse({"choices": [{"delta": {"content": "lo"}}]}),
+        _sse({"choices": []}),
+        _sse("[DONE]"),
+        _sse({"choices": [{"delta": {"content": "ignored"}}]}),
+    ]
+    requests: list[httpx.Request] = []
+    assert _collect(_client("openai", OPENAI_URL, lines, requests)) == ["Hel", "lo"]
+    assert orjson.loads(requests[0].content)["stream"] is True
+
+
+def _yandex_line(text: str) -> str:
+    return orjson.dumps({"result": {"alternatives": [{"message": {"text": text}}]}}).decode()
+
+
+def test_yandex_stream_turns_cumulative_text_into_deltas():
+    lines = [_yandex_line(text) for text in ["Hel", "Hello", "Hello", "Hello, world"]]
+    requests: list[httpx.Request] = []
+    assert _collect(_client("yandex", YANDEX_URL, lines, requests)) == ["Hel", "lo", ", world"]
+    assert orjson.loads(requests[0].content)["completionOptions"]["stream"] is True
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from megashkola_agent import llm_gateway
+from megashkola_agent.llm_gateway import TokenBucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+        self._sleep = asyncio.sleep
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+        await self._sleep(0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(llm_gateway.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(llm_gateway.asyncio, "sleep", clock.sleep)
+    return clock
+
+
+def test_consume_within_capacity_does_not_wait(clock):
+    bucket = TokenBucket(10, period=10.0)
+    asyncio.run(bucket.consume(4))
+    asyncio.run(bucket.consume(6))
+    assert clock.sleeps == []
+    assert bucket.tokens == 0
+
+
+def test_consume_waits_for_refill(clock):
+    bucket = TokenBucket(10, period=10.0)  # one token per second
+    asyncio.run(bucket.consume(10))
+    asyncio.run(bucket.consume(3))
+    assert clock.sleeps == [pytest.approx(3.0)]
+    assert clock.now == pytest.approx(3.0)
+
+
+def test_refill_is_capped_at_capacity(clock):
+    bucket = TokenBucket(10, period=10.0)
+    asyncio.run(bucket.consume(10))
+    clock.now += 100
+    asyncio.run(bucket.consume(10))
+    assert clock.sleeps == []
+    assert bucket.tokens == 0
+
+
+def test_oversized_request_drains_bucket_instead_of_blocking(clock):
+    bucket = TokenBucket(10, period=10.0)
+    asyncio.run(bucket.consume(50))
+    assert clock.sleeps == []
+    assert bucket.tokens == 0
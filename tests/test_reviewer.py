@@ -0,0 +1,89 @@
+import asyncio
+import gc
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from megashkola_agent import reviewer
+from megashkola_agent.reviewer import ReviewContext, ReviewerAgent
+
+
+def _old_build_prompt(ctx: ReviewContext) -> str:
+    # The list-and-join version that _build_prompt replaced.
+    pr = ctx.pr
+    files = ctx.files
+    file_list = "\n".join([f"- {f.filename}" for f in files])
+    patches = []
+    for f in files:
+        if f.patch:
+            patches.append(f"File: {f.filename}\n{f.patch}")
+    patch_text = "\n\n".join(patches) if patches else "No diff available."
+    return (
+        f"PR title: {pr.title}\n\n"
+        f"PR body:\n{pr.body}\n\n"
+        f"Issue title: {ctx.issue_title}\n\n"
+        f"Issue body:\n{ctx.issue_body}\n\n"
+        f"Changed files:\n{file_list}\n\n"
+        f"Diff:\n{patch_text}\n\n"
+        f"CI status: {ctx.ci_status}\n\n"
+        "Check if changes satisfy the issue requirements and CI is green."
+    )
+
+
+def _file(filename: str, patch: str | None) -> SimpleNamespace:
+    return SimpleNamespace(filename=filename, patch=patch)
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setattr(reviewer, "Github", lambda token: SimpleNamespace(get_repo=lambda r: None))
+    return ReviewerAgent("token", "o/r", llm=None)
+
+
+def test_failed_issue_lookup_leaves_no_unretrieved_file_listing(agent):
+    issue_failed = threading.Event()
+
+    def get_files():
+        issue_failed.wait(5)
+        raise RuntimeError("files listing failed")
+
+    def get_issue(number):
+        issue_failed.set()
+        raise LookupError("issue lookup failed")
+
+    pr = SimpleNamespace(title="Fix #3", head=SimpleNamespace(ref="x"), get_files=get_files)
+    agent.repo = SimpleNamespace(get_pull=lambda number: pr, get_issue=get_issue)
+    unhandled: list[dict] = []
+
+    async def run():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, ctx: unhandled.append(ctx))
+        with pytest.raises(LookupError):
+            await agent.review_pr(5, "success")
+        await asyncio.sleep(0.1)  # let the listing thread fail
+        gc.collect()
+
+    asyncio.run(run())
+    assert unhandled == []
+
+
+@pytest.mark.parametrize(
+    "files",
+    [
+        [],
+        [_file("a.py", None)],
+        [_file("a.py", "@@ -1 +1 @@\n-a\n+b"), _file("b.bin", None), _file("c.py", "")],
+        [_file("a.py", "@@ -1 +1 @@\n-50%\n+100%"), _file("%(pr_title)s", "+x")],
+    ],
+)
+@pytest.mark.parametrize("body", [None, "", "Fixes #3 with 100% %s coverage"])
+def test_prompt_matches_previous_format(agent, files, body):
+    ctx = ReviewContext(
+        pr=SimpleNamespace(title="Fix #3", body=body),
+        issue_number=3,
+        issue_title="Issue %d",
+        issue_body="Body\n",
+        ci_status="success",
+        files=files,
+    )
+    assert agent._build_prompt(ctx) == _old_build_prompt(ctx)
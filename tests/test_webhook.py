@@ -0,0 +1,50 @@
+import hashlib
+import hmac
+
+from megashkola_agent.webhook import issue_number_from_payload, verify_signature
+
+SECRET = "s3cret"
+BODY = b'{"action": "opened"}'
+
+
+def _sign(secret: str, body: bytes) -> str:
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def test_verify_signature_accepts_matching_digest():
+    assert verify_signature(SECRET, BODY, _sign(SECRET, BODY))
+
+
+def test_verify_signature_rejects_bad_input():
+    assert not verify_signature(SECRET, BODY, _sign("other", BODY))
+    assert not verify_signature(SECRET, BODY + b" ", _sign(SECRET, BODY))
+    assert not verify_signature(SECRET, BODY, None)
+    assert not verify_signature(SECRET, BODY, _sign(SECRET, BODY).removeprefix("sha256="))
+    assert not verify_signature("", BODY, _sign("", BODY))
+
+
+def _payload(action: str, labels: list[str], added: str | None = None) -> dict:
+    payload = {
+        "action": action,
+        "issue": {"number": 7, "labels": [{"name": name} for name in labels]},
+    }
+    if added is not None:
+        payload["label"] = {"name": added}
+    return payload
+
+
+def test_opened_issue_with_agent_label():
+    assert issue_number_from_payload(_payload("opened", ["bug", "agent"]), "agent") == 7
+    assert issue_number_from_payload(_payload("opened", ["bug"]), "agent") is None
+
+
+def test_labeled_only_for_agent_label():
+    assert issue_number_from_payload(_payload("labeled", ["agent"], "agent"), "agent") == 7
+    # The issue already carries the agent label, but the event is about another one.
+    assert issue_number_from_payload(_payload("labeled", ["agent", "bug"], "bug"), "agent") is None
+
+
+def test_other_actions_and_malformed_payloads_are_ignored():
+    assert issue_number_from_payload(_payload("closed", ["agent"]), "agent") is None
+    assert issue_number_from_payload({"action": "opened"}, "agent") is None
+    assert issue_number_from_payload({}, "agent") is None